@@ -3,7 +3,13 @@ import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
+from plotly_resampler import FigureResampler
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+from numba import njit
+import pyarrow.parquet as pq
 from datetime import datetime, timedelta
+from types import SimpleNamespace
 import warnings
 import os
 
@@ -44,7 +50,116 @@ st.markdown("""
     </style>
     """, unsafe_allow_html=True)
 
+# ==================== CHART THEME ====================
+# Shared by every figure; charts override only what differs
+THEME_LAYOUT = dict(
+    template='plotly_dark',
+    plot_bgcolor='#0f172a',
+    paper_bgcolor='#1e293b',
+    font=dict(color='#f1f5f9', family='Arial, sans-serif'),
+    height=400,
+    margin=dict(l=0, r=0, t=30, b=0)
+)
+
+# ==================== COMPILED KERNELS ====================
+# Compiled once and cached on disk. Kept serial: Streamlit runs each session on its own
+# thread, and numba's parallel threading layers are not safe to enter concurrently.
+@njit(cache=True)
+def count_comorbidities(conditions):
+    """Number of conditions flagged (code 1) on each row of the int8 condition matrix."""
+    n, k = conditions.shape
+    counts = np.zeros(n, np.int8)
+    for i in range(n):
+        count = 0
+        for j in range(k):
+            if conditions[i, j] == 1:
+                count += 1
+        counts[i] = count
+    return counts
+
+@njit(cache=True)
+def comorbidity_stats(conditions, mortality):
+    """Patients and deaths with each condition, plus total deaths, in one row-major pass."""
+    n, k = conditions.shape
+    with_counts = np.zeros(k, np.int64)
+    with_deaths = np.zeros(k, np.int64)
+    total_deaths = 0
+    for i in range(n):
+        died = mortality[i]
+        total_deaths += died
+        for j in range(k):
+            if conditions[i, j] == 1:
+                with_counts[j] += 1
+                with_deaths[j] += died
+    return with_counts, with_deaths, total_deaths
+
 # ==================== LOAD AND CACHE DATA ====================
+COMORBIDITIES = ['DIABETES', 'COPD', 'ASTHMA', 'INMSUPR', 'HIPERTENSION',
+                 'OTHER_DISEASE', 'CARDIOVASCULAR', 'OBESITY', 'RENAL_CHRONIC', 'TOBACCO']
+
+# Only the fields the dashboard actually uses are read from disk
+USED_COLUMNS = ['SEX', 'PATIENT_TYPE', 'AGE', 'DATE_DIED', 'CLASIFFICATION_FINAL',
+                'ICU', 'INTUBED', 'MEDICAL_UNIT'] + COMORBIDITIES
+
+# Encoded values and their display labels (codes not listed decode to missing)
+SEX_CODES, SEX_LABELS = [1, 2, 97], ['Male', 'Female', 'Unknown']
+PATIENT_TYPE_CODES, PATIENT_TYPE_LABELS = [1, 2, 97], ['Ambulatory', 'Hospitalized', 'Unknown']
+CLASSIFICATION_CODES = [1, 2, 3, 4, 5, 6, 7]
+CLASSIFICATION_LABELS = [
+    'Suspected',
+    'Confirmed',
+    'Suspected Not COVID-19',
+    'Confirmed COVID-19 Not Related',
+    'COVID-19 Patient',
+    'Suspected COVID-19 Related',
+    'Confirmed COVID-19 Related Death',
+]
+
+# Records above this age are treated as data-entry errors and dropped at load time
+MAX_AGE = 120
+AGE_BINS = [0, 18, 30, 40, 50, 60, 70, 80, 130]
+AGE_LABELS = ['0-17', '18-29', '30-39', '40-49', '50-59', '60-69', '70-79', '80+']
+
+def decode_codes(values, codes, labels):
+    """Decode small-integer codes into a Categorical with a single lookup-table gather."""
+    values = np.asarray(values)
+    lookup = np.full(max(codes) + 1, -1, dtype=np.int8)
+    lookup[codes] = np.arange(len(codes))
+    # Nulls arrive as NaN in a float column; NaN fails both comparisons and decodes to missing
+    in_range = (values >= 0) & (values < len(lookup))
+    category_codes = np.where(in_range, lookup[np.where(in_range, values, 0).astype(np.intp)], -1)
+    return pd.Categorical.from_codes(category_codes, categories=labels)
+
+def ensure_parquet(csv_path):
+    """Convert the CSV to a zstd-compressed Parquet file next to it (once) and return its path.
+    
+    Returns None when the Parquet copy cannot be written.
+    """
+    csv_path = str(csv_path)
+    parquet_path = os.path.splitext(csv_path)[0] + '.parquet'
+    
+    # Reuse an existing Parquet file unless the CSV is newer
+    if os.path.exists(parquet_path) and (
+        not os.path.exists(csv_path) or os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path)
+    ):
+        return parquet_path
+    
+    table = pa_csv.read_csv(csv_path)
+    # Write to a temporary file first so an interrupted write never leaves a truncated copy
+    tmp_path = f"{parquet_path}.{os.getpid()}.tmp"
+    try:
+        pq.write_table(table, tmp_path, compression='zstd')
+        os.replace(tmp_path, parquet_path)
+    except Exception:
+        # e.g. a read-only deployment; the caller falls back to the CSV
+        if os.path.exists(tmp_path):
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        return None
+    return parquet_path
+
 @st.cache_data
 def load_covid_data():
     import pathlib
@@ -68,7 +183,14 @@ def load_covid_data():
     
     for file_path in file_paths:
         try:
-            df = pd.read_csv(file_path)
+            parquet_path = ensure_parquet(file_path)
+            if parquet_path is not None:
+                available_columns = [col for col in USED_COLUMNS if col in pq.read_schema(parquet_path).names]
+                table = pq.read_table(parquet_path, columns=available_columns)
+            else:
+                table = pa_csv.read_csv(file_path)
+                table = table.select([col for col in USED_COLUMNS if col in table.column_names])
+            df = table.to_pandas()
             st.success(f"✅ Data loaded from: {file_path}")
             break
         except FileNotFoundError:
@@ -101,44 +223,47 @@ def load_covid_data():
         """)
         st.stop()
     
-    # Create mapping dictionaries for encoded values
-    sex_map = {1: 'Male', 2: 'Female', 97: 'Unknown'}
-    patient_type_map = {1: 'Ambulatory', 2: 'Hospitalized', 97: 'Unknown'}
-    classification_map = {
-        1: 'Suspected',
-        2: 'Confirmed',
-        3: 'Suspected Not COVID-19',
-        4: 'Confirmed COVID-19 Not Related',
-        5: 'COVID-19 Patient',
-        6: 'Suspected COVID-19 Related',
-        7: 'Confirmed COVID-19 Related Death',
-    }
-    
     try:
-        # Decode columns - handle missing columns gracefully
+        # Drop implausible ages once here instead of on every slider move
+        if 'AGE' in df.columns:
+            df = df[df['AGE'] <= MAX_AGE].reset_index(drop=True)
+        
+        # Decode columns straight into categoricals - handle missing columns gracefully
         if 'SEX' in df.columns:
-            df['SEX'] = df['SEX'].map(sex_map)
+            df['SEX'] = decode_codes(df['SEX'].to_numpy(), SEX_CODES, SEX_LABELS)
         if 'PATIENT_TYPE' in df.columns:
-            df['PATIENT_TYPE'] = df['PATIENT_TYPE'].map(patient_type_map)
+            df['PATIENT_TYPE'] = decode_codes(df['PATIENT_TYPE'].to_numpy(), PATIENT_TYPE_CODES, PATIENT_TYPE_LABELS)
         if 'CLASIFFICATION_FINAL' in df.columns:
-            df['CLASSIFICATION'] = df['CLASIFFICATION_FINAL'].map(classification_map)
+            df['CLASSIFICATION'] = decode_codes(df['CLASIFFICATION_FINAL'].to_numpy(),
+                                                CLASSIFICATION_CODES, CLASSIFICATION_LABELS)
+            # The raw codes are not used after decoding
+            df = df.drop(columns='CLASIFFICATION_FINAL')
         if 'DATE_DIED' in df.columns:
             df['DATE_DIED'] = pd.to_datetime(df['DATE_DIED'], errors='coerce')
         
+        # Downcast to compact dtypes so every filter pass scans less memory
+        if 'AGE' in df.columns:
+            df['AGE'] = df['AGE'].astype('uint8')
+            df['AGE_GROUP'] = pd.cut(df['AGE'], bins=AGE_BINS, labels=AGE_LABELS, right=False)
+        for col in COMORBIDITIES + ['ICU', 'INTUBED', 'MEDICAL_UNIT']:
+            if col in df.columns:
+                df[col] = pd.to_numeric(df[col], downcast='unsigned')
+        
         # Create mortality flag
         if 'DATE_DIED' in df.columns:
-            df['MORTALITY'] = df['DATE_DIED'].notna().astype(int)
+            df['MORTALITY'] = df['DATE_DIED'].notna().astype('bool')
         else:
-            df['MORTALITY'] = 0
+            df['MORTALITY'] = False
+        # int8 copy used as counts/weights in the groupby-free rate calculations
+        df['MORTALITY_I8'] = df['MORTALITY'].astype(np.int8)
         
         # Create comorbidity columns
-        comorbidities = ['DIABETES', 'COPD', 'ASTHMA', 'INMSUPR', 'HIPERTENSION', 
-                         'OTHER_DISEASE', 'CARDIOVASCULAR', 'OBESITY', 'RENAL_CHRONIC', 'TOBACCO']
-        available_comorbidities = [col for col in comorbidities if col in df.columns]
+        available_comorbidities = [col for col in COMORBIDITIES if col in df.columns]
         if available_comorbidities:
-            df['COMORBIDITY_COUNT'] = df[available_comorbidities].apply(lambda x: (x == 1).sum(), axis=1)
+            conditions = df[available_comorbidities].to_numpy(dtype=np.int8, copy=False)
+            df['COMORBIDITY_COUNT'] = count_comorbidities(conditions)
         else:
-            df['COMORBIDITY_COUNT'] = 0
+            df['COMORBIDITY_COUNT'] = np.int8(0)
             
     except Exception as e:
         st.error(f"Error processing data columns: {str(e)}")
@@ -146,7 +271,427 @@ def load_covid_data():
     
     return df
 
+# ==================== FILTERING AND AGGREGATION ====================
+def selection_key(selected):
+    """Normalise a multiselect value into a hashable filter key (None means no filtering)."""
+    if not selected or 'All' in selected:
+        return None
+    return tuple(sorted(selected))
+
+def column_array(df, name):
+    """NumPy view of a column, or None when the column is missing."""
+    return df[name].to_numpy() if name in df.columns else None
+
+def get_arrays(df):
+    """Return the hot columns as contiguous NumPy arrays, built once per session.
+    
+    Filters and aggregations read these arrays directly (categoricals as their
+    integer codes); pandas is only used again to display rows.
+    """
+    arrs = st.session_state.get('arrs')
+    if arrs is None or arrs.n_rows != len(df):
+        condition_names = [col for col in COMORBIDITIES if col in df.columns]
+        arrs = SimpleNamespace(
+            n_rows=len(df),
+            age=column_array(df, 'AGE'),
+            mortality=column_array(df, 'MORTALITY'),
+            mortality_i8=column_array(df, 'MORTALITY_I8'),
+            sex=df['SEX'].cat.codes.to_numpy() if 'SEX' in df.columns else None,
+            patient_type=df['PATIENT_TYPE'].cat.codes.to_numpy() if 'PATIENT_TYPE' in df.columns else None,
+            classification=df['CLASSIFICATION'].cat.codes.to_numpy() if 'CLASSIFICATION' in df.columns else None,
+            age_group=df['AGE_GROUP'].cat.codes.to_numpy() if 'AGE_GROUP' in df.columns else None,
+            medical_unit=column_array(df, 'MEDICAL_UNIT'),
+            comorbidity_count=column_array(df, 'COMORBIDITY_COUNT'),
+            condition_names=condition_names,
+            conditions=np.ascontiguousarray(df[condition_names].to_numpy(dtype=np.int8)) if condition_names else None,
+            icu=df['ICU'].isin([1, 2]).to_numpy() if 'ICU' in df.columns else None,
+            intubed=df['INTUBED'].isin([1, 2]).to_numpy() if 'INTUBED' in df.columns else None,
+        )
+        st.session_state['arrs'] = arrs
+    return arrs
+
+def present_labels(codes, labels):
+    """Labels whose code occurs at least once in ``codes``."""
+    counts = np.bincount(codes[codes >= 0], minlength=len(labels))
+    return [labels[i] for i in np.flatnonzero(counts)]
+
+def sorted_counts(codes, labels=None, top=None):
+    """Non-empty counts per code, most frequent first (``value_counts`` over integer codes).
+    
+    Without ``labels`` the codes themselves are used as the index. ``top`` keeps only
+    the most frequent entries, selected with ``np.argpartition``.
+    """
+    counts = np.bincount(codes[codes >= 0], minlength=0 if labels is None else len(labels))
+    order = np.flatnonzero(counts)
+    if top is not None and len(order) > top:
+        order = order[np.argpartition(counts[order], -top)[-top:]]
+    order = order[np.argsort(-counts[order], kind='stable')]
+    return pd.Series(counts[order], index=order if labels is None else np.asarray(labels)[order])
+
+def build_filter_mask(arrs, sex_key=None, patient_type_key=None, age_min=None, age_max=None,
+                      mortality_key=None, icu_only=False, min_comorbidities=0):
+    """Combine all sidebar predicates into a single boolean row mask."""
+    mask = np.ones(arrs.n_rows, dtype=bool)
+    if sex_key and arrs.sex is not None:
+        mask &= np.isin(arrs.sex, [SEX_LABELS.index(label) for label in sex_key])
+    if patient_type_key and arrs.patient_type is not None:
+        mask &= np.isin(arrs.patient_type, [PATIENT_TYPE_LABELS.index(label) for label in patient_type_key])
+    if age_min is not None and age_max is not None and arrs.age is not None:
+        mask &= (arrs.age >= age_min) & (arrs.age <= age_max)
+    if mortality_key and arrs.mortality is not None:
+        mortality_filter = [outcome == 'Deceased' for outcome in mortality_key]
+        mask &= np.isin(arrs.mortality, mortality_filter)
+    if icu_only and arrs.icu is not None:
+        mask &= arrs.icu
+    if min_comorbidities and arrs.comorbidity_count is not None:
+        mask &= arrs.comorbidity_count >= min_comorbidities
+    return mask
+
+def grouped_mortality(codes, mortality, labels, label_name):
+    """Deaths, totals and mortality rate per group code via ``np.bincount``.
+    
+    Negative (missing) codes are ignored and empty groups are dropped, matching
+    ``groupby(..., observed=True)``.
+    """
+    valid = codes >= 0
+    deaths = np.bincount(codes[valid], weights=mortality[valid], minlength=len(labels))
+    total = np.bincount(codes[valid], minlength=len(labels))
+    observed = total > 0
+    return pd.DataFrame({
+        label_name: np.asarray(labels)[observed],
+        'Deaths': deaths[observed].astype(np.int64),
+        'Total': total[observed],
+        'Mortality_Rate': deaths[observed] / total[observed] * 100,
+    })
+
+# Each section has its own cached aggregate function so only the visible section is computed.
+# The arrays and mask are not hashed (leading underscore): they derive from the cached loader
+# and the filter state, so the small filter-state arguments alone identify each result.
+# The caches are shared by all sessions, so each keeps only a bounded number of filter states.
+AGGREGATE_CACHE_ENTRIES = 256
+@st.cache_data(max_entries=AGGREGATE_CACHE_ENTRIES, show_spinner=False)
+def compute_kpis(_arrs, _mask, sex_key, patient_type_key, age_min, age_max,
+                 mortality_key, icu_only, min_comorbidities):
+    """Headline metrics for one filter state (also used by the sidebar record count)."""
+    kpis = {}
+    total_cases = int(_mask.sum())
+    kpis['total_cases'] = total_cases
+    kpis['deaths'] = int(_arrs.mortality_i8[_mask].sum())
+    kpis['mortality_rate'] = (kpis['deaths'] / total_cases * 100) if total_cases > 0 else 0
+    kpis['avg_age'] = _arrs.age[_mask].mean() if _arrs.age is not None else 0
+    if _arrs.patient_type is not None:
+        hospitalized = int((_arrs.patient_type[_mask] == PATIENT_TYPE_LABELS.index('Hospitalized')).sum())
+        kpis['hosp_rate'] = (hospitalized / total_cases * 100) if total_cases > 0 else 0
+    else:
+        kpis['hosp_rate'] = 0
+    return kpis
+
+@st.cache_data(max_entries=AGGREGATE_CACHE_ENTRIES, show_spinner=False)
+def compute_epi_aggregates(_arrs, _mask, sex_key, patient_type_key, age_min, age_max,
+                           mortality_key, icu_only, min_comorbidities):
+    """Aggregates behind the epidemiological insight charts for one filter state."""
+    mortality = _arrs.mortality_i8[_mask]
+    aggs = {}
+    
+    # Mortality by age group, gender and number of comorbidities
+    aggs['age_mortality'] = grouped_mortality(_arrs.age_group[_mask], mortality, AGE_LABELS, 'AGE_GROUP')
+    aggs['gender_stats'] = grouped_mortality(_arrs.sex[_mask], mortality, SEX_LABELS, 'SEX')
+    aggs['comorbidity_mortality'] = grouped_mortality(
+        _arrs.comorbidity_count[_mask], mortality, np.arange(len(COMORBIDITIES) + 1), 'COMORBIDITY_COUNT')
+    
+    # Patient type and classification distributions
+    aggs['patient_type_dist'] = sorted_counts(_arrs.patient_type[_mask], PATIENT_TYPE_LABELS)
+    aggs['classification_dist'] = sorted_counts(_arrs.classification[_mask], CLASSIFICATION_LABELS)
+    
+    # Critical care utilization
+    intubed = _arrs.intubed[_mask]
+    icu = _arrs.icu[_mask]
+    aggs['critical_care'] = pd.DataFrame({
+        'Metric': ['Intubated', 'ICU Admitted', 'Both'],
+        'Count': [int(intubed.sum()), int(icu.sum()), int((intubed & icu).sum())]
+    })
+    
+    return aggs
+
+@st.cache_data(max_entries=AGGREGATE_CACHE_ENTRIES, show_spinner=False)
+def compute_comorbidity_aggregates(_arrs, _mask, sex_key, patient_type_key, age_min, age_max,
+                                   mortality_key, icu_only, min_comorbidities):
+    """Per-condition prevalence and mortality impact for one filter state."""
+    total_cases = int(_mask.sum())
+    aggs = {}
+    if _arrs.conditions is None:
+        aggs['comorbidity_df'] = None
+        return aggs
+    
+    # One fused scan of the condition matrix
+    conditions = _arrs.conditions[_mask]
+    with_counts, with_deaths, total_deaths = comorbidity_stats(conditions, _arrs.mortality_i8[_mask])
+    without_counts = total_cases - with_counts
+    without_deaths = total_deaths - with_deaths
+    
+    present = (with_counts > 0) & (without_counts > 0)
+    if present.any():
+        with_mortality = with_deaths[present] / with_counts[present] * 100
+        without_mortality = without_deaths[present] / without_counts[present] * 100
+        aggs['comorbidity_df'] = pd.DataFrame({
+            'Condition': [name.replace('_', ' ').title() for name in np.array(_arrs.condition_names)[present]],
+            'Prevalence (%)': with_counts[present] / total_cases * 100,
+            'Mortality with Condition (%)': with_mortality,
+            'Mortality without Condition (%)': without_mortality,
+            'Excess Risk (%)': with_mortality - without_mortality
+        }).sort_values('Excess Risk (%)', ascending=False)
+    else:
+        aggs['comorbidity_df'] = None
+    
+    return aggs
+
+@st.cache_data(max_entries=AGGREGATE_CACHE_ENTRIES, show_spinner=False)
+def compute_summary_aggregates(_arrs, _mask, sex_key, patient_type_key, age_min, age_max,
+                               mortality_key, icu_only, min_comorbidities):
+    """Outcome, gender and medical-unit summary tables for one filter state."""
+    total_cases = int(_mask.sum())
+    deaths = int(_arrs.mortality_i8[_mask].sum())
+    aggs = {}
+    
+    aggs['outcome_df'] = pd.DataFrame({
+        'Outcome': ['Survived', 'Deceased'],
+        'Count': [total_cases - deaths, deaths]
+    })
+    gender_data = sorted_counts(_arrs.sex[_mask], SEX_LABELS).reset_index()
+    gender_data.columns = ['Gender', 'Count']
+    aggs['gender_data'] = gender_data
+    unit_data = sorted_counts(_arrs.medical_unit[_mask], top=10).reset_index()
+    unit_data.columns = ['Unit', 'Count']
+    aggs['unit_data'] = unit_data
+    
+    return aggs
+
+def get_filter_mask(arrs, filter_state):
+    """Row mask for ``filter_state``, reused from session state while the state is unchanged."""
+    mask = st.session_state.get('_last_mask')
+    if st.session_state.get('_last_key') != filter_state or mask is None or len(mask) != arrs.n_rows:
+        mask = build_filter_mask(arrs, *filter_state)
+        st.session_state['_last_key'] = filter_state
+        st.session_state['_last_mask'] = mask
+    return mask
+
+def memoized_aggregates(compute, arrs, mask, filter_state):
+    """Result of a cached aggregate function, memoized in session state by filter state.
+    
+    Reruns that leave the filters untouched skip even the ``st.cache_data`` lookup.
+    """
+    memo = st.session_state.setdefault('_aggregate_memo', {})
+    entry = memo.get(compute.__name__)
+    if entry is None or entry[0] != filter_state or entry[1] is not mask:
+        entry = (filter_state, mask, compute(arrs, mask, *filter_state))
+        memo[compute.__name__] = entry
+    return entry[2]
+
+# ==================== FIGURE BUILDERS ====================
+def hash_pandas(obj):
+    """Content hash of a small aggregate frame or series, used as a figure cache key."""
+    return pd.util.hash_pandas_object(obj).to_numpy().tobytes()
+
+# Figures are cached by the content of their aggregate, so unchanged data skips all Plotly work
+PANDAS_HASH_FUNCS = {pd.DataFrame: hash_pandas, pd.Series: hash_pandas}
+# The figure caches are process-wide, so bound them per builder
+FIGURE_CACHE_ENTRIES = 64
+
+@st.cache_resource(hash_funcs=PANDAS_HASH_FUNCS, max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def build_age_fig(age_mortality):
+    return go.Figure({
+        'data': [{
+            'type': 'bar',
+            'x': age_mortality['AGE_GROUP'],
+            'y': age_mortality['Mortality_Rate'],
+            'marker': {
+                'color': age_mortality['Mortality_Rate'],
+                'colorscale': 'Reds',
+                'showscale': False,
+                'line': {'color': '#00d4ff', 'width': 1}
+            },
+            'text': [f"{x:.1f}%" for x in age_mortality['Mortality_Rate']],
+            'textposition': 'outside',
+            'hovertemplate': '<b>Age: %{x}</b><br>Mortality Rate: %{y:.1f}%<extra></extra>'
+        }],
+        'layout': {
+            **THEME_LAYOUT,
+            'xaxis': {'title': 'Age Group'},
+            'yaxis': {'title': 'Mortality Rate (%)'},
+            'hovermode': 'x unified'
+        }
+    })
+
+@st.cache_resource(hash_funcs=PANDAS_HASH_FUNCS, max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def build_gender_fig(gender_stats):
+    return go.Figure({
+        'data': [
+            {
+                'type': 'bar',
+                'x': gender_stats['SEX'],
+                'y': gender_stats['Total'],
+                'name': 'Total Cases',
+                'marker': {'color': '#0099ff'},
+                'hovertemplate': '<b>%{x}</b><br>Cases: %{y:,.0f}<extra></extra>'
+            },
+            {
+                'type': 'bar',
+                'x': gender_stats['SEX'],
+                'y': gender_stats['Deaths'],
+                'name': 'Deaths',
+                'marker': {'color': '#ff4444'},
+                'hovertemplate': '<b>%{x}</b><br>Deaths: %{y:,.0f}<extra></extra>'
+            }
+        ],
+        'layout': {
+            **THEME_LAYOUT,
+            'barmode': 'group',
+            'xaxis': {'title': 'Gender'},
+            'yaxis': {'title': 'Count'},
+            'hovermode': 'x'
+        }
+    })
+
+@st.cache_resource(hash_funcs=PANDAS_HASH_FUNCS, max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def build_comorbidity_count_fig(comorbidity_mortality):
+    # Line traces go through the resampler so only aggregated points reach the browser,
+    # and render with WebGL (Scattergl keeps the tozeroy fill)
+    fig = FigureResampler(go.Figure({
+        'layout': {
+            **THEME_LAYOUT,
+            'xaxis': {'title': 'Number of Comorbidities'},
+            'yaxis': {'title': 'Mortality Rate (%)'},
+            'hovermode': 'x'
+        }
+    }))
+    fig.add_trace(go.Scattergl(
+        mode='lines+markers',
+        name='Mortality Rate',
+        line=dict(color='#00d4ff', width=3),
+        marker=dict(size=10, color='#00d4ff', line=dict(color='#0099ff', width=2)),
+        fill='tozeroy',
+        fillcolor='rgba(0, 212, 255, 0.1)',
+        hovertemplate='<b>Comorbidities: %{x}</b><br>Mortality Rate: %{y:.1f}%<extra></extra>'
+    ), hf_x=comorbidity_mortality['COMORBIDITY_COUNT'].to_numpy(), hf_y=comorbidity_mortality['Mortality_Rate'].to_numpy())
+    return fig
+
+@st.cache_resource(hash_funcs=PANDAS_HASH_FUNCS, max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def build_patient_type_fig(patient_type_dist):
+    return go.Figure({
+        'data': [{
+            'type': 'pie',
+            'labels': patient_type_dist.index,
+            'values': patient_type_dist.values,
+            'marker': {
+                'colors': ['#0099ff', '#00d4ff', '#ff6b6b'],
+                'line': {'color': '#1a1f26', 'width': 2}
+            },
+            'textposition': 'auto',
+            'hovertemplate': '<b>%{label}</b><br>Count: %{value:,.0f}<br>Share: %{percent}<extra></extra>'
+        }],
+        'layout': THEME_LAYOUT
+    })
+
+@st.cache_resource(hash_funcs=PANDAS_HASH_FUNCS, max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def build_critical_care_fig(critical_care):
+    return go.Figure({
+        'data': [{
+            'type': 'bar',
+            'x': critical_care['Metric'],
+            'y': critical_care['Count'],
+            'marker': {
+                'color': ['#ff9900', '#ff4444', '#ff0000'],
+                'line': {'color': '#00d4ff', 'width': 2}
+            },
+            'text': [f"{x:,}" for x in critical_care['Count']],
+            'textposition': 'outside',
+            'hovertemplate': '<b>%{x}</b><br>Count: %{y:,}<extra></extra>'
+        }],
+        'layout': {
+            **THEME_LAYOUT,
+            'xaxis': {'title': 'Care Type'},
+            'yaxis': {'title': 'Count'}
+        }
+    })
+
+@st.cache_resource(hash_funcs=PANDAS_HASH_FUNCS, max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def build_classification_fig(classification_dist):
+    return go.Figure({
+        'data': [{
+            'type': 'bar',
+            'y': classification_dist.index,
+            'x': classification_dist.values,
+            'orientation': 'h',
+            'marker': {
+                'color': classification_dist.values,
+                'colorscale': 'Viridis',
+                'line': {'color': '#00d4ff', 'width': 1}
+            },
+            'text': [f"{x:,}" for x in classification_dist.values],
+            'textposition': 'outside',
+            'hovertemplate': '<b>%{y}</b><br>Count: %{x:,}<extra></extra>'
+        }],
+        'layout': {
+            **THEME_LAYOUT,
+            'xaxis': {'title': 'Count'},
+            'yaxis': {'title': 'Classification'},
+            'margin': {**THEME_LAYOUT['margin'], 'l': 200}
+        }
+    })
+
+@st.cache_resource(hash_funcs=PANDAS_HASH_FUNCS, max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def build_excess_risk_fig(comorbidity_df):
+    return go.Figure({
+        'data': [{
+            'type': 'bar',
+            'y': comorbidity_df['Condition'],
+            'x': comorbidity_df['Excess Risk (%)'],
+            'orientation': 'h',
+            'marker': {
+                'color': comorbidity_df['Excess Risk (%)'],
+                'colorscale': 'Reds',
+                'line': {'color': '#00d4ff', 'width': 1}
+            },
+            'text': [f"{x:.1f}%" for x in comorbidity_df['Excess Risk (%)']],
+            'textposition': 'outside',
+            'hovertemplate': '<b>%{y}</b><br>Excess Risk: %{x:.1f}%<extra></extra>'
+        }],
+        'layout': {
+            **THEME_LAYOUT,
+            'xaxis': {'title': 'Excess Mortality Risk (%)'},
+            'yaxis': {'title': 'Condition'},
+            'height': 450,
+            'margin': {**THEME_LAYOUT['margin'], 'l': 180}
+        }
+    })
+
+@st.cache_resource(hash_funcs=PANDAS_HASH_FUNCS, max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def build_prevalence_fig(comorbidity_df):
+    return go.Figure({
+        'data': [{
+            'type': 'bar',
+            'y': comorbidity_df['Condition'],
+            'x': comorbidity_df['Prevalence (%)'],
+            'orientation': 'h',
+            'marker': {
+                'color': '#0099ff',
+                'line': {'color': '#00d4ff', 'width': 1}
+            },
+            'text': [f"{x:.1f}%" for x in comorbidity_df['Prevalence (%)']],
+            'textposition': 'outside',
+            'hovertemplate': '<b>%{y}</b><br>Prevalence: %{x:.1f}%<extra></extra>'
+        }],
+        'layout': {
+            **THEME_LAYOUT,
+            'xaxis': {'title': 'Prevalence (%)'},
+            'yaxis': {'title': 'Condition'},
+            'height': 450,
+            'margin': {**THEME_LAYOUT['margin'], 'l': 180}
+        }
+    })
+
 df = load_covid_data()
+arrs = get_arrays(df)
 
 # ==================== DASHBOARD HEADER ====================
 col_logo, col_title = st.columns([1, 5])
@@ -163,483 +708,234 @@ st.markdown("---")
 # ==================== SIDEBAR FILTERS ====================
 st.sidebar.markdown("### 🎯 ADVANCED FILTERS")
 
+# Filter state defaults (used when a column is missing from the data)
+sex_key = patient_type_key = mortality_key = None
+age_min, age_max = 0, MAX_AGE
+icu_hospitalized = False
+min_comorbidities = 0
+
 # Sex Filter
 if 'SEX' in df.columns:
-    sex_options = ['All'] + sorted(df['SEX'].dropna().unique().tolist())
+    sex_options = ['All'] + sorted(present_labels(arrs.sex, SEX_LABELS))
     selected_sex = st.sidebar.multiselect('**Patient Gender**', sex_options, default='All')
-    if 'All' not in selected_sex and selected_sex:
-        df_filtered = df[df['SEX'].isin(selected_sex)]
-    else:
-        df_filtered = df.copy()
-else:
-    df_filtered = df.copy()
+    sex_key = selection_key(selected_sex)
 
 # Patient Type Filter
-if 'PATIENT_TYPE' in df_filtered.columns:
-    patient_types = ['All'] + sorted(df_filtered['PATIENT_TYPE'].dropna().unique().tolist())
+if 'PATIENT_TYPE' in df.columns:
+    patient_type_codes = arrs.patient_type[build_filter_mask(arrs, sex_key)] if sex_key else arrs.patient_type
+    patient_types = ['All'] + sorted(present_labels(patient_type_codes, PATIENT_TYPE_LABELS))
     selected_patient_type = st.sidebar.multiselect('**Patient Type**', patient_types, default='All')
-    if 'All' not in selected_patient_type and selected_patient_type:
-        df_filtered = df_filtered[df_filtered['PATIENT_TYPE'].isin(selected_patient_type)]
+    patient_type_key = selection_key(selected_patient_type)
 
 # Age Range Filter
-if 'AGE' in df_filtered.columns:
-    age_min, age_max = st.sidebar.slider('**Age Range**', 0, 130, (0, 130))
-    df_filtered = df_filtered[(df_filtered['AGE'] >= age_min) & (df_filtered['AGE'] <= age_max)]
+if 'AGE' in df.columns:
+    age_min, age_max = st.sidebar.slider('**Age Range**', 0, MAX_AGE, (0, MAX_AGE))
 
 # Mortality Status Filter
-if 'MORTALITY' in df_filtered.columns:
+if 'MORTALITY' in df.columns:
     mortality_options = st.sidebar.multiselect('**Patient Outcome**', 
                                               ['All', 'Survived', 'Deceased'], 
                                               default='All')
-    if 'All' not in mortality_options and mortality_options:
-        mortality_filter = []
-        if 'Deceased' in mortality_options:
-            mortality_filter.append(1)
-        if 'Survived' in mortality_options:
-            mortality_filter.append(0)
-        df_filtered = df_filtered[df_filtered['MORTALITY'].isin(mortality_filter)]
+    mortality_key = selection_key(mortality_options)
 
 # ICU Status Filter
-if 'ICU' in df_filtered.columns:
+if 'ICU' in df.columns:
     icu_hospitalized = st.sidebar.checkbox('**Limit to ICU Patients**', value=False)
-    if icu_hospitalized:
-        df_filtered = df_filtered[df_filtered['ICU'].isin([1, 2])]
 
 # Comorbidity Filter
-if 'COMORBIDITY_COUNT' in df_filtered.columns:
+if 'COMORBIDITY_COUNT' in df.columns:
     min_comorbidities = st.sidebar.slider('**Minimum Comorbidities**', 0, 10, 0)
-    df_filtered = df_filtered[df_filtered['COMORBIDITY_COUNT'] >= min_comorbidities]
-
-st.sidebar.markdown("---")
-st.sidebar.markdown(f"**📈 Records Selected:** {len(df_filtered):,} / {len(df):,}")
-st.sidebar.markdown(f"**Data Coverage:** {(len(df_filtered)/len(df)*100):.1f}%")
 
-# ==================== KEY METRICS ====================
-st.markdown("### 📊 KEY PERFORMANCE INDICATORS")
+# Aggregates are cached per filter state, so revisiting a selection skips all the work
+filter_state = (sex_key, patient_type_key, age_min, age_max, mortality_key, icu_hospitalized, min_comorbidities)
+mask = get_filter_mask(arrs, filter_state)
+kpis = memoized_aggregates(compute_kpis, arrs, mask, filter_state)
 
-col1, col2, col3, col4, col5 = st.columns(5)
-
-with col1:
-    total_cases = len(df_filtered)
-    st.markdown(f"""
-    <div class="metric-box">
-        <div class="metric-label">Total Cases</div>
-        <div class="metric-value">{total_cases:,}</div>
-    </div>
-    """, unsafe_allow_html=True)
-
-with col2:
-    if 'MORTALITY' in df_filtered.columns:
-        mortality_rate = (df_filtered['MORTALITY'].sum() / len(df_filtered) * 100) if len(df_filtered) > 0 else 0
-    else:
-        mortality_rate = 0
-    st.markdown(f"""
-    <div class="metric-box">
-        <div class="metric-label">Mortality Rate</div>
-        <div class="metric-value">{mortality_rate:.1f}%</div>
-    </div>
-    """, unsafe_allow_html=True)
-
-with col3:
-    if 'MORTALITY' in df_filtered.columns:
-        deaths = df_filtered['MORTALITY'].sum()
-    else:
-        deaths = 0
-    st.markdown(f"""
-    <div class="metric-box">
-        <div class="metric-label">Total Deaths</div>
-        <div class="metric-value">{deaths:,}</div>
-    </div>
-    """, unsafe_allow_html=True)
+st.sidebar.markdown("---")
+st.sidebar.markdown(f"**📈 Records Selected:** {kpis['total_cases']:,} / {len(df):,}")
+st.sidebar.markdown(f"**Data Coverage:** {(kpis['total_cases']/len(df)*100):.1f}%")
+
+# ==================== SECTION ROUTER ====================
+# Only the selected section computes its aggregates and builds its charts on each rerun
+DASHBOARD_SECTIONS = ['KPIs', 'Epidemiology', 'Comorbidity', 'Data']
+active_tab = st.radio('**Section**', DASHBOARD_SECTIONS, horizontal=True,
+                      key='active_tab', label_visibility='collapsed')
+
+if active_tab == 'KPIs':
+    # ==================== KEY METRICS ====================
+    st.markdown("### 📊 KEY PERFORMANCE INDICATORS")
+
+    col1, col2, col3, col4, col5 = st.columns(5)
+
+    with col1:
+        total_cases = kpis['total_cases']
+        st.markdown(f"""
+        <div class="metric-box">
+            <div class="metric-label">Total Cases</div>
+            <div class="metric-value">{total_cases:,}</div>
+        </div>
+        """, unsafe_allow_html=True)
+
+    with col2:
+        mortality_rate = kpis['mortality_rate']
+        st.markdown(f"""
+        <div class="metric-box">
+            <div class="metric-label">Mortality Rate</div>
+            <div class="metric-value">{mortality_rate:.1f}%</div>
+        </div>
+        """, unsafe_allow_html=True)
+
+    with col3:
+        deaths = kpis['deaths']
+        st.markdown(f"""
+        <div class="metric-box">
+            <div class="metric-label">Total Deaths</div>
+            <div class="metric-value">{deaths:,}</div>
+        </div>
+        """, unsafe_allow_html=True)
+
+    with col4:
+        avg_age = kpis['avg_age']
+        st.markdown(f"""
+        <div class="metric-box">
+            <div class="metric-label">Average Age</div>
+            <div class="metric-value">{avg_age:.1f}</div>
+        </div>
+        """, unsafe_allow_html=True)
+
+    with col5:
+        hosp_rate = kpis['hosp_rate']
+        st.markdown(f"""
+        <div class="metric-box">
+            <div class="metric-label">Hospitalization Rate</div>
+            <div class="metric-value">{hosp_rate:.1f}%</div>
+        </div>
+        """, unsafe_allow_html=True)
 
-with col4:
-    if 'AGE' in df_filtered.columns:
-        avg_age = df_filtered['AGE'].mean()
-    else:
-        avg_age = 0
-    st.markdown(f"""
-    <div class="metric-box">
-        <div class="metric-label">Average Age</div>
-        <div class="metric-value">{avg_age:.1f}</div>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown("---")
 
-with col5:
-    if 'PATIENT_TYPE' in df_filtered.columns:
-        hospitalized = len(df_filtered[df_filtered['PATIENT_TYPE'] == 'Hospitalized'])
-        hosp_rate = (hospitalized / len(df_filtered) * 100) if len(df_filtered) > 0 else 0
-    else:
-        hosp_rate = 0
-    st.markdown(f"""
-    <div class="metric-box">
-        <div class="metric-label">Hospitalization Rate</div>
-        <div class="metric-value">{hosp_rate:.1f}%</div>
-    </div>
-    """, unsafe_allow_html=True)
+    # Show a quick status to avoid timeout
+    st.success("✅ Dashboard loaded! Rendering visualizations...")
 
-st.markdown("---")
+elif active_tab == 'Epidemiology':
+    # ==================== ADVANCED VISUALIZATIONS ====================
+    st.markdown("### 📈 EPIDEMIOLOGICAL INSIGHTS")
+    aggs = memoized_aggregates(compute_epi_aggregates, arrs, mask, filter_state)
 
-# Show a quick status to avoid timeout
-st.success("✅ Dashboard loaded! Rendering visualizations...")
+    col_viz1, col_viz2 = st.columns(2)
 
-# ==================== ADVANCED VISUALIZATIONS ====================
-st.markdown("### 📈 EPIDEMIOLOGICAL INSIGHTS")
+    # 1. Mortality by Age Distribution
+    with col_viz1:
+        st.markdown("#### Mortality Risk by Age Group")
+        
+        st.plotly_chart(build_age_fig(aggs['age_mortality']), use_container_width=True)
 
-col_viz1, col_viz2 = st.columns(2)
+    # 2. Gender Distribution & Mortality Comparison
+    with col_viz2:
+        st.markdown("#### Gender Analysis")
+        
+        st.plotly_chart(build_gender_fig(aggs['gender_stats']), use_container_width=True)
 
-# 1. Mortality by Age Distribution
-with col_viz1:
-    st.markdown("#### Mortality Risk by Age Group")
-    
-    age_bins = [0, 18, 30, 40, 50, 60, 70, 80, 130]
-    age_labels = ['0-17', '18-29', '30-39', '40-49', '50-59', '60-69', '70-79', '80+']
-    df_filtered['AGE_GROUP'] = pd.cut(df_filtered['AGE'], bins=age_bins, labels=age_labels, right=False)
-    
-    age_mortality = df_filtered.groupby('AGE_GROUP', observed=True).agg({
-        'MORTALITY': ['sum', 'count']
-    }).reset_index()
-    age_mortality.columns = ['AGE_GROUP', 'Deaths', 'Total']
-    age_mortality['Mortality_Rate'] = (age_mortality['Deaths'] / age_mortality['Total'] * 100)
-    
-    fig1 = go.Figure()
-    fig1.add_trace(go.Bar(
-        x=age_mortality['AGE_GROUP'],
-        y=age_mortality['Mortality_Rate'],
-        marker=dict(
-            color=age_mortality['Mortality_Rate'],
-            colorscale='Reds',
-            showscale=False,
-            line=dict(color='#00d4ff', width=1)
-        ),
-        text=[f"{x:.1f}%" for x in age_mortality['Mortality_Rate']],
-        textposition='outside',
-        hovertemplate='<b>Age: %{x}</b><br>Mortality Rate: %{y:.1f}%<extra></extra>'
-    ))
-    fig1.update_layout(
-        template='plotly_dark',
-        plot_bgcolor='#0f172a',
-        paper_bgcolor='#1e293b',
-        font=dict(color='#f1f5f9', family='Arial, sans-serif'),
-        xaxis_title='Age Group',
-        yaxis_title='Mortality Rate (%)',
-        hovermode='x unified',
-        height=400,
-        margin=dict(l=0, r=0, t=30, b=0)
-    )
-    st.plotly_chart(fig1, use_container_width=True)
-
-# 2. Gender Distribution & Mortality Comparison
-with col_viz2:
-    st.markdown("#### Gender Analysis")
-    
-    gender_stats = df_filtered.groupby('SEX', observed=True).agg({
-        'MORTALITY': ['sum', 'count']
-    }).reset_index()
-    gender_stats.columns = ['SEX', 'Deaths', 'Total']
-    gender_stats['Mortality_Rate'] = (gender_stats['Deaths'] / gender_stats['Total'] * 100)
-    
-    fig2 = go.Figure()
-    fig2.add_trace(go.Bar(
-        x=gender_stats['SEX'],
-        y=gender_stats['Total'],
-        name='Total Cases',
-        marker=dict(color='#0099ff'),
-        hovertemplate='<b>%{x}</b><br>Cases: %{y:,.0f}<extra></extra>'
-    ))
-    fig2.add_trace(go.Bar(
-        x=gender_stats['SEX'],
-        y=gender_stats['Deaths'],
-        name='Deaths',
-        marker=dict(color='#ff4444'),
-        hovertemplate='<b>%{x}</b><br>Deaths: %{y:,.0f}<extra></extra>'
-    ))
-    fig2.update_layout(
-        template='plotly_dark',
-        plot_bgcolor='#0f172a',
-        paper_bgcolor='#1e293b',
-        font=dict(color='#f1f5f9', family='Arial, sans-serif'),
-        barmode='group',
-        xaxis_title='Gender',
-        yaxis_title='Count',
-        hovermode='x',
-        height=400,
-        margin=dict(l=0, r=0, t=30, b=0)
-    )
-    st.plotly_chart(fig2, use_container_width=True)
-
-col_viz3, col_viz4 = st.columns(2)
-
-# 3. Comorbidity Impact on Mortality
-with col_viz3:
-    st.markdown("#### Comorbidity Impact on Mortality")
-    
-    comorbidity_mortality = df_filtered.groupby('COMORBIDITY_COUNT', observed=True).agg({
-        'MORTALITY': ['sum', 'count']
-    }).reset_index()
-    comorbidity_mortality.columns = ['COMORBIDITY_COUNT', 'Deaths', 'Total']
-    comorbidity_mortality['Mortality_Rate'] = (comorbidity_mortality['Deaths'] / comorbidity_mortality['Total'] * 100)
-    
-    fig3 = go.Figure()
-    fig3.add_trace(go.Scatter(
-        x=comorbidity_mortality['COMORBIDITY_COUNT'],
-        y=comorbidity_mortality['Mortality_Rate'],
-        mode='lines+markers',
-        name='Mortality Rate',
-        line=dict(color='#00d4ff', width=3),
-        marker=dict(size=10, color='#00d4ff', line=dict(color='#0099ff', width=2)),
-        fill='tozeroy',
-        fillcolor='rgba(0, 212, 255, 0.1)',
-        hovertemplate='<b>Comorbidities: %{x}</b><br>Mortality Rate: %{y:.1f}%<extra></extra>'
-    ))
-    fig3.update_layout(
-        template='plotly_dark',
-        plot_bgcolor='#0f172a',
-        paper_bgcolor='#1e293b',
-        font=dict(color='#f1f5f9', family='Arial, sans-serif'),
-        xaxis_title='Number of Comorbidities',
-        yaxis_title='Mortality Rate (%)',
-        hovermode='x',
-        height=400,
-        margin=dict(l=0, r=0, t=30, b=0)
-    )
-    st.plotly_chart(fig3, use_container_width=True)
-
-# 4. Patient Type Distribution
-with col_viz4:
-    st.markdown("#### Patient Type Distribution")
-    
-    patient_type_dist = df_filtered['PATIENT_TYPE'].value_counts()
-    
-    fig4 = go.Figure(data=[go.Pie(
-        labels=patient_type_dist.index,
-        values=patient_type_dist.values,
-        marker=dict(
-            colors=['#0099ff', '#00d4ff', '#ff6b6b'],
-            line=dict(color='#1a1f26', width=2)
-        ),
-        textposition='auto',
-        hovertemplate='<b>%{label}</b><br>Count: %{value:,.0f}<br>Share: %{percent}<extra></extra>'
-    )])
-    fig4.update_layout(
-        template='plotly_dark',
-        paper_bgcolor='#1e293b',
-        font=dict(color='#f1f5f9', family='Arial, sans-serif'),
-        height=400,
-        margin=dict(l=0, r=0, t=30, b=0)
-    )
-    st.plotly_chart(fig4, use_container_width=True)
+    col_viz3, col_viz4 = st.columns(2)
 
-st.markdown("---")
-
-col_viz5, col_viz6 = st.columns(2)
+    # 3. Comorbidity Impact on Mortality
+    with col_viz3:
+        st.markdown("#### Comorbidity Impact on Mortality")
+        
+        st.plotly_chart(build_comorbidity_count_fig(aggs['comorbidity_mortality']), use_container_width=True)
 
-# 5. Intubation & ICU Admission Rates
-with col_viz5:
-    st.markdown("#### Critical Care Utilization")
-    
-    critical_care = pd.DataFrame({
-        'Metric': ['Intubated', 'ICU Admitted', 'Both'],
-        'Count': [
-            len(df_filtered[df_filtered['INTUBED'].isin([1, 2])]),
-            len(df_filtered[df_filtered['ICU'].isin([1, 2])]),
-            len(df_filtered[(df_filtered['INTUBED'].isin([1, 2])) & (df_filtered['ICU'].isin([1, 2]))])
-        ]
-    })
-    
-    fig5 = go.Figure(data=[go.Bar(
-        x=critical_care['Metric'],
-        y=critical_care['Count'],
-        marker=dict(
-            color=['#ff9900', '#ff4444', '#ff0000'],
-            line=dict(color='#00d4ff', width=2)
-        ),
-        text=[f"{x:,}" for x in critical_care['Count']],
-        textposition='outside',
-        hovertemplate='<b>%{x}</b><br>Count: %{y:,}<extra></extra>'
-    )])
-    fig5.update_layout(
-        template='plotly_dark',
-        plot_bgcolor='#0f172a',
-        paper_bgcolor='#1e293b',
-        font=dict(color='#f1f5f9', family='Arial, sans-serif'),
-        xaxis_title='Care Type',
-        yaxis_title='Count',
-        height=400,
-        margin=dict(l=0, r=0, t=30, b=0)
-    )
-    st.plotly_chart(fig5, use_container_width=True)
-
-# 6. Classification Distribution
-with col_viz6:
-    st.markdown("#### Case Classification")
-    
-    classification_dist = df_filtered['CLASSIFICATION'].value_counts()
-    
-    fig6 = go.Figure(data=[go.Bar(
-        y=classification_dist.index,
-        x=classification_dist.values,
-        orientation='h',
-        marker=dict(
-            color=classification_dist.values,
-            colorscale='Viridis',
-            line=dict(color='#00d4ff', width=1)
-        ),
-        text=[f"{x:,}" for x in classification_dist.values],
-        textposition='outside',
-        hovertemplate='<b>%{y}</b><br>Count: %{x:,}<extra></extra>'
-    )])
-    fig6.update_layout(
-        template='plotly_dark',
-        plot_bgcolor='#0f172a',
-        paper_bgcolor='#1e293b',
-        font=dict(color='#f1f5f9', family='Arial, sans-serif'),
-        xaxis_title='Count',
-        yaxis_title='Classification',
-        height=400,
-        margin=dict(l=200, r=0, t=30, b=0)
-    )
-    st.plotly_chart(fig6, use_container_width=True)
+    # 4. Patient Type Distribution
+    with col_viz4:
+        st.markdown("#### Patient Type Distribution")
+        
+        st.plotly_chart(build_patient_type_fig(aggs['patient_type_dist']), use_container_width=True)
 
-st.markdown("---")
+    st.markdown("---")
 
-# ==================== ADVANCED ANALYTICS ====================
-st.markdown("### 🔬 DETAILED COMORBIDITY ANALYSIS")
+    col_viz5, col_viz6 = st.columns(2)
 
-comorbidities_list = ['DIABETES', 'COPD', 'ASTHMA', 'INMSUPR', 'HIPERTENSION', 
-                      'OTHER_DISEASE', 'CARDIOVASCULAR', 'OBESITY', 'RENAL_CHRONIC', 'TOBACCO']
+    # 5. Intubation & ICU Admission Rates
+    with col_viz5:
+        st.markdown("#### Critical Care Utilization")
+        
+        st.plotly_chart(build_critical_care_fig(aggs['critical_care']), use_container_width=True)
 
-# Calculate comorbidity prevalence and mortality impact
-comorbidity_analysis = []
-for comorbidity in comorbidities_list:
-    with_condition = df_filtered[df_filtered[comorbidity] == 1]
-    without_condition = df_filtered[df_filtered[comorbidity] != 1]
-    
-    if len(with_condition) > 0 and len(without_condition) > 0:
-        with_mortality = with_condition['MORTALITY'].sum() / len(with_condition) * 100
-        without_mortality = without_condition['MORTALITY'].sum() / len(without_condition) * 100
-        prevalence = len(with_condition) / len(df_filtered) * 100
+    # 6. Classification Distribution
+    with col_viz6:
+        st.markdown("#### Case Classification")
         
-        comorbidity_analysis.append({
-            'Condition': comorbidity.replace('_', ' ').title(),
-            'Prevalence (%)': prevalence,
-            'Mortality with Condition (%)': with_mortality,
-            'Mortality without Condition (%)': without_mortality,
-            'Excess Risk (%)': with_mortality - without_mortality
-        })
+        st.plotly_chart(build_classification_fig(aggs['classification_dist']), use_container_width=True)
 
-# Check if comorbidity data exists
-if comorbidity_analysis:
-    comorbidity_df = pd.DataFrame(comorbidity_analysis).sort_values('Excess Risk (%)', ascending=False)
-else:
-    st.warning("⚠️ No comorbidity data available for the selected filters. Please adjust your filters.")
     st.markdown("---")
-    comorbidity_df = None
 
-col_analysis1, col_analysis2 = st.columns(2)
+elif active_tab == 'Comorbidity':
+    # ==================== ADVANCED ANALYTICS ====================
+    st.markdown("### 🔬 DETAILED COMORBIDITY ANALYSIS")
+    aggs = memoized_aggregates(compute_comorbidity_aggregates, arrs, mask, filter_state)
 
-if comorbidity_df is not None:
-    with col_analysis1:
-        st.markdown("#### Excess Mortality Risk by Condition")
-        
-        fig7 = go.Figure(data=[go.Bar(
-            y=comorbidity_df['Condition'],
-            x=comorbidity_df['Excess Risk (%)'],
-            orientation='h',
-            marker=dict(
-                color=comorbidity_df['Excess Risk (%)'],
-                colorscale='Reds',
-                line=dict(color='#00d4ff', width=1)
-            ),
-            text=[f"{x:.1f}%" for x in comorbidity_df['Excess Risk (%)']],
-            textposition='outside',
-            hovertemplate='<b>%{y}</b><br>Excess Risk: %{x:.1f}%<extra></extra>'
-        )])
-        fig7.update_layout(
-            template='plotly_dark',
-            plot_bgcolor='#0f172a',
-            paper_bgcolor='#1e293b',
-            font=dict(color='#f1f5f9', family='Arial, sans-serif'),
-            xaxis_title='Excess Mortality Risk (%)',
-            yaxis_title='Condition',
-            height=450,
-            margin=dict(l=180, r=0, t=30, b=0)
-        )
-        st.plotly_chart(fig7, use_container_width=True)
+    comorbidity_df = aggs['comorbidity_df']
+    if comorbidity_df is None:
+        st.warning("⚠️ No comorbidity data available for the selected filters. Please adjust your filters.")
+        st.markdown("---")
 
-    with col_analysis2:
-        st.markdown("#### Condition Prevalence")
-        
-        fig8 = go.Figure(data=[go.Bar(
-            y=comorbidity_df['Condition'],
-            x=comorbidity_df['Prevalence (%)'],
-            orientation='h',
-            marker=dict(
-                color='#0099ff',
-                line=dict(color='#00d4ff', width=1)
-            ),
-            text=[f"{x:.1f}%" for x in comorbidity_df['Prevalence (%)']],
-            textposition='outside',
-            hovertemplate='<b>%{y}</b><br>Prevalence: %{x:.1f}%<extra></extra>'
-        )])
-        fig8.update_layout(
-            template='plotly_dark',
-            plot_bgcolor='#0f172a',
-            paper_bgcolor='#1e293b',
-            font=dict(color='#f1f5f9', family='Arial, sans-serif'),
-            xaxis_title='Prevalence (%)',
-            yaxis_title='Condition',
-            height=450,
-            margin=dict(l=180, r=0, t=30, b=0)
-        )
-        st.plotly_chart(fig8, use_container_width=True)
+    col_analysis1, col_analysis2 = st.columns(2)
 
-st.markdown("---")
+    if comorbidity_df is not None:
+        with col_analysis1:
+            st.markdown("#### Excess Mortality Risk by Condition")
+            
+            st.plotly_chart(build_excess_risk_fig(comorbidity_df), use_container_width=True)
 
-# ==================== DETAILED DATA TABLE ====================
-st.markdown("### 📋 FILTERED DATASET")
+        with col_analysis2:
+            st.markdown("#### Condition Prevalence")
+            
+            st.plotly_chart(build_prevalence_fig(comorbidity_df), use_container_width=True)
 
-display_cols = ['SEX', 'AGE', 'PATIENT_TYPE', 'MORTALITY', 'COMORBIDITY_COUNT', 
-                'DIABETES', 'CARDIOVASCULAR', 'HIPERTENSION', 'OBESITY', 'INTUBED', 'ICU']
+    st.markdown("---")
 
-if st.checkbox('Show raw data table', value=False):
-    st.dataframe(
-        df_filtered[display_cols].head(100),
-        use_container_width=True,
-        height=400
-    )
+elif active_tab == 'Data':
+    # ==================== DETAILED DATA TABLE ====================
+    st.markdown("### 📋 FILTERED DATASET")
+
+    display_cols = ['SEX', 'AGE', 'PATIENT_TYPE', 'MORTALITY', 'COMORBIDITY_COUNT', 
+                    'DIABETES', 'CARDIOVASCULAR', 'HIPERTENSION', 'OBESITY', 'INTUBED', 'ICU']
+
+    if st.checkbox('Show raw data table', value=False):
+        # Only the first 100 matching rows are materialised, handed over as an Arrow table
+        # so Streamlit skips its own pandas-to-Arrow conversion
+        first_rows = np.flatnonzero(mask)[:100]
+        table = pa.Table.from_pandas(df.iloc[first_rows][display_cols],
+                                     preserve_index=False)
+        st.dataframe(
+            table,
+            use_container_width=True,
+            height=400
+        )
 
-st.markdown("---")
+    st.markdown("---")
 
-# ==================== SUMMARY STATISTICS ====================
-st.markdown("### 📊 SUMMARY STATISTICS")
+    # ==================== SUMMARY STATISTICS ====================
+    st.markdown("### 📊 SUMMARY STATISTICS")
+    aggs = memoized_aggregates(compute_summary_aggregates, arrs, mask, filter_state)
 
-col_stat1, col_stat2, col_stat3 = st.columns(3)
+    col_stat1, col_stat2, col_stat3 = st.columns(3)
 
-with col_stat1:
-    st.markdown("#### Outcome Summary")
-    outcome_data = {
-        'Outcome': ['Survived', 'Deceased'],
-        'Count': [
-            len(df_filtered[df_filtered['MORTALITY'] == 0]),
-            len(df_filtered[df_filtered['MORTALITY'] == 1])
-        ]
-    }
-    outcome_df = pd.DataFrame(outcome_data)
-    st.dataframe(outcome_df, use_container_width=True, hide_index=True)
+    with col_stat1:
+        st.markdown("#### Outcome Summary")
+        outcome_df = aggs['outcome_df']
+        st.dataframe(outcome_df, use_container_width=True, hide_index=True)
 
-with col_stat2:
-    st.markdown("#### Gender Distribution")
-    gender_data = df_filtered['SEX'].value_counts().reset_index()
-    gender_data.columns = ['Gender', 'Count']
-    st.dataframe(gender_data, use_container_width=True, hide_index=True)
+    with col_stat2:
+        st.markdown("#### Gender Distribution")
+        gender_data = aggs['gender_data']
+        st.dataframe(gender_data, use_container_width=True, hide_index=True)
 
-with col_stat3:
-    st.markdown("#### Medical Unit Distribution")
-    unit_data = df_filtered['MEDICAL_UNIT'].value_counts().head(10).reset_index()
-    unit_data.columns = ['Unit', 'Count']
-    st.dataframe(unit_data, use_container_width=True, hide_index=True)
+    with col_stat3:
+        st.markdown("#### Medical Unit Distribution")
+        unit_data = aggs['unit_data']
+        st.dataframe(unit_data, use_container_width=True, hide_index=True)
 
-st.markdown("---")
+    st.markdown("---")
 
 # ==================== FOOTER ====================
 st.markdown("""